@@ -32,24 +32,47 @@ Usage:
     # Python: from adk_agent import root_agent
 """
 
+import hashlib
 import os
+import re
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from google.adk.agents.llm_agent import Agent
+from google.adk.models.google_llm import Gemini
+from google.adk.models.lite_llm import LiteLlm
 from web_utils import fetch_webpage_content
+from page_cache import PageCache
+from retrieval import build_index
+from storage import create_storage
 from config import Config
 
-# Storage for webpage content (in-memory, shared across sessions)
-webpage_storage = {}
+# Storage for webpage content (shared across sessions; across workers with REDIS_URL)
+webpage_storage = create_storage(Config.REDIS_URL)
+
+# Persistent cache of fetched pages (survives restarts, shared across processes)
+page_cache = PageCache(Config.PAGE_CACHE_PATH, ttl=Config.PAGE_CACHE_TTL)
+
+# Characters in the default content preview (precomputed at fetch time)
+PREVIEW_CHARS = 500
+
+# Tool result message (emoji are added by the UI, not the tool)
+_OK_MSG = "Successfully fetched and stored %d words from the webpage. You can now ask questions about it."
+
+# Matches one whitespace-delimited word
+_WORD_RE = re.compile(r"\S+")
 
 # Get model configuration from environment
 MODEL_PROVIDER = os.getenv("MODEL_PROVIDER", "ollama").lower()
 MODEL_NAME = os.getenv("MODEL_NAME", "mistral")
 
+# Print model initialization banners (set ADK_VERBOSE=true)
+VERBOSE = os.getenv("ADK_VERBOSE", "false").lower() == "true"
+
 SYSTEM_INSTRUCTION = """You are a helpful AI assistant with webpage fetching capabilities.
 
 IMPORTANT: You have access to these tools:
@@ -83,30 +106,69 @@ def fetch_and_store_webpage(url: str) -> dict:
         dict with status, message, and content information
     """
     try:
-        # Fetch webpage (returns tuple: success, content)
-        success, content = fetch_webpage_content(url, max_words=Config.MAX_WORDS)
+        cached = page_cache.get(url)
+        if cached:
+            # Fresh copy in the persistent cache, skip the HTTP fetch
+            content = cached["content"]
+            word_count = cached["word_count"]
+        else:
+            # Fetch webpage (returns tuple: success, content)
+            success, content = fetch_webpage_content(url, max_words=Config.MAX_WORDS)
+            
+            if not success:
+                return {
+                    "status": "error",
+                    "message": content,  # content contains error message if failed
+                    "content": "",
+                    "word_count": 0
+                }
+            
+            # Content is already cleaned by fetch_webpage_content
+            # Count words without materializing a list of them
+            word_count = sum(1 for _ in _WORD_RE.finditer(content))
+            page_cache.set(url, content, word_count)
+        
+        # Identity of the content, used to key per-page caches
+        content_hash = hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
         
-        if not success:
-            return {
-                "status": "error",
-                "message": content,  # content contains error message if failed
-                "content": "",
-                "word_count": 0
-            }
+        # Embed page chunks once so questions only send the relevant ones
+        webpage_storage.local.pop("vecs", None)
+        if Config.USE_RETRIEVAL:
+            try:
+                chunks, vectors = build_index(
+                    content,
+                    model=Config.EMBED_MODEL,
+                    api_base=Config.MODEL_OPTIONS["ollama"]["base_url"],
+                    chunk_words=Config.RETRIEVAL_CHUNK_WORDS
+                )
+                # Tagged with the page hash so an index is never used for another page
+                webpage_storage.local["vecs"] = (content_hash, chunks, vectors)
+            except Exception as e:
+                print(f"⚠️ Embedding failed, using full page content: {e}")
         
-        # Content is already cleaned by fetch_webpage_content
-        words = content.split()
-        word_count = len(words)
+        # Precompute the preview once so summaries don't re-slice
+        preview = content[:PREVIEW_CHARS] + "..." if len(content) > PREVIEW_CHARS else content
         
-        # Store in memory (shared across all sessions)
-        webpage_storage["url"] = url
-        webpage_storage["content"] = content
-        webpage_storage["word_count"] = word_count
+        # Cut the prompt context once here rather than on every question
+        if 0 < Config.PROMPT_CONTEXT_CHARS < len(content):
+            content_for_prompt = content[:Config.PROMPT_CONTEXT_CHARS]
+        else:
+            content_for_prompt = None  # Full content fits
+        
+        # Store for question answering (shared across all sessions) in one write
+        webpage_storage.update(
+            url=url,
+            content=content,
+            content_for_prompt=content_for_prompt,
+            word_count=word_count,
+            preview_500=preview,
+            content_hash=content_hash
+        )
         
         return {
             "status": "success",
-            "message": f"✅ Successfully fetched and stored {word_count} words from the webpage. You can now ask questions about it.",
-            "content": content[:500] + "..." if len(content) > 500 else content,  # Preview
+            "message": _OK_MSG % word_count,
+            "content": preview,
             "word_count": word_count
         }
         
@@ -137,8 +199,12 @@ def get_content_summary(max_chars: int = 500) -> dict:
             "word_count": 0
         }
     
-    content = webpage_storage["content"]
-    summary = content[:max_chars] + "..." if len(content) > max_chars else content
+    content = webpage_storage.get("content")
+    preview = webpage_storage.get("preview_500") if max_chars == PREVIEW_CHARS else None
+    if preview is not None:
+        summary = preview
+    else:
+        summary = content[:max_chars] + "..." if len(content) > max_chars else content
     
     return {
         "status": "success",
@@ -160,10 +226,26 @@ def get_stored_content() -> str:
     return webpage_storage.get("content", "")
 
 
+# Startup banner prefix per LiteLLM provider
+_PROVIDER_BANNERS = {
+    "ollama": "🦙 Initializing Ollama",
+    "openai": "🔵 Initializing OpenAI",
+    "anthropic": "🟣 Initializing Anthropic Claude",
+}
+
+
+def _log(message: str):
+    """Print a message when ADK_VERBOSE=true."""
+    if VERBOSE:
+        print(message)
+
+
+@lru_cache(maxsize=1)
 def create_model():
     """
     Create the appropriate model based on MODEL_PROVIDER environment variable.
     Supports: ollama, openai, anthropic, gemini
+    The instance is cached, so repeated calls (e.g. on re-import) reuse it.
     
     Returns:
         Model instance configured for the specified provider
@@ -173,31 +255,14 @@ def create_model():
     
     if provider == "gemini":
         # Use ADK's native Gemini model
-        from google.adk.models.gemini import Gemini
-        print(f"🤖 Initializing Gemini model: {model_name}")
+        _log(f"🤖 Initializing Gemini model: {model_name}")
         return Gemini(model=model_name)
     
-    else:
-        # Use LiteLLM for all other providers (ollama, openai, anthropic, etc.)
-        from google.adk.models.lite_llm import LiteLlm
-        
-        # Map providers to LiteLLM format
-        if provider == "ollama":
-            # Use ollama_chat provider for better compatibility
-            litellm_model = f"ollama_chat/{model_name}"
-            print(f"🦙 Initializing Ollama model: {model_name}")
-        elif provider == "openai":
-            litellm_model = model_name  # e.g., "gpt-4", "gpt-3.5-turbo"
-            print(f"🔵 Initializing OpenAI model: {model_name}")
-        elif provider == "anthropic":
-            litellm_model = model_name  # e.g., "claude-3-sonnet-20240229"
-            print(f"🟣 Initializing Anthropic Claude model: {model_name}")
-        else:
-            # Generic LiteLLM format
-            litellm_model = f"{provider}/{model_name}"
-            print(f"⚙️ Initializing {provider} model: {model_name}")
-        
-        return LiteLlm(model=litellm_model)
+    # Use LiteLLM for all other providers (ollama, openai, anthropic, etc.)
+    litellm_model, _ = Config.get_litellm_model(provider, model_name)
+    _log(f"{_PROVIDER_BANNERS.get(provider, '⚙️ Initializing ' + provider)} model: {model_name}")
+    
+    return LiteLlm(model=litellm_model)
 
 
 # Create the ADK agent with flexible model support
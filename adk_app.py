@@ -4,21 +4,21 @@ Uses Google Agent Development Kit (ADK) with LiteLLM + Ollama (Self-hosted Mistr
 """
 
 import streamlit as st
+import litellm
 import os
-from dotenv import load_dotenv
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from web_utils import get_content_preview
-import config as app_config
+from retrieval import EmbedBatcher, top_k_chunks
+import config as app_config  # Also loads .env and adk_agent/.env
 
 # Import ADK components
-from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
-from google.genai.types import Content, Part
 from adk_agent import root_agent, webpage_storage, fetch_and_store_webpage
 
-# Load environment variables
-load_dotenv()
-load_dotenv("adk_agent/.env")  # Also load ADK-specific config
-
 # Page configuration
 st.set_page_config(
     page_title="Web Crawling Chatbot - ADK",
@@ -27,6 +27,15 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Maximum number of cached LLM responses kept in webpage_storage.local["resp_cache"]
+RESPONSE_CACHE_MAXSIZE = 256
+
+# Tokens kept free for the prompt template, the question and the answer
+CONTEXT_RESERVED_TOKENS = 1024
+
+# Greetings answered without webpage context
+_GREETINGS = frozenset({'hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening'})
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -37,103 +46,442 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+@st.cache_resource
+def get_runner():
+    """
+    Create the ADK Runner and session service once per process.
+    All Streamlit sessions share them; chat history stays per-session.
+    
+    Returns:
+        Tuple of (runner, session_service)
+    """
+    # Deferred so the runner and session modules only load when USE_ADK_RUNNER is set
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    
+    session_service = InMemorySessionService()
+    # Use 'adk_agent' as app_name to match the module/folder name
+    runner = Runner(
+        agent=root_agent,
+        app_name="adk_agent",  # Must match the folder name where agent.py is located
+        session_service=session_service
+    )
+    return runner, session_service
+
+
+@st.cache_resource
+def get_fetch_executor() -> ThreadPoolExecutor:
+    """Create the process-wide thread pool that runs webpage fetches."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="webpage_fetch")
+
+
 def initialize_session_state():
     """Initialize Streamlit session state variables."""
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
     
-    # ADK-specific session state
-    if "adk_session_service" not in st.session_state:
-        st.session_state.adk_session_service = InMemorySessionService()
-    
-    if "adk_runner" not in st.session_state:
-        # Use 'adk_agent' as app_name to match the module/folder name
-        st.session_state.adk_runner = Runner(
-            agent=root_agent,
-            app_name="adk_agent",  # Must match the folder name where agent.py is located
-            session_service=st.session_state.adk_session_service
-        )
+    # ADK-specific session state (Runner and service are shared process-wide)
+    if app_config.Config.USE_ADK_RUNNER and "adk_runner" not in st.session_state:
+        st.session_state.adk_runner, st.session_state.adk_session_service = get_runner()
     
     if "adk_user_id" not in st.session_state:
         st.session_state.adk_user_id = "streamlit_user"
     
     if "adk_session_id" not in st.session_state:
         st.session_state.adk_session_id = "session_001"
+    
+    # Load the Ollama model in the background before the first question
+    if "adk_warmed" not in st.session_state:
+        st.session_state.adk_warmed = _start_model_warmup()
+
 
+# Resolve provider routing once instead of on every message
+LITELLM_PROVIDER = os.getenv("MODEL_PROVIDER", "ollama").lower()
+LITELLM_MODEL, LITELLM_API_BASE = app_config.Config.get_litellm_model(
+    LITELLM_PROVIDER, os.getenv("MODEL_NAME", "mistral")
+)
 
-def ask_agent_with_context(question: str) -> str:
+
+def _get_context_budget(model: str) -> int:
     """
-    Ask the agent a question with webpage context using direct LiteLLM.
-    Model-agnostic approach that works reliably.
+    Get the number of webpage-content tokens that fit in the model's context window.
     
     Args:
-        question: User's question
+        model: LiteLLM model string
         
     Returns:
-        Agent's response
+        Token budget for webpage content
     """
     try:
-        import litellm
+        max_input_tokens = litellm.get_model_info(model).get("max_input_tokens")
+    except Exception:
+        max_input_tokens = None
+    
+    # Unknown models (e.g. most Ollama tags) fall back to the configured window,
+    # which is shared between the prompt and the generated answer
+    if not max_input_tokens:
+        max_input_tokens = app_config.Config.CONTEXT_WINDOW - app_config.Config.DEFAULT_MAX_TOKENS
+    
+    return max(max_input_tokens - CONTEXT_RESERVED_TOKENS, 0)
+
+
+def _trim_content_to_budget(content: str, content_hash: str, model: str) -> str:
+    """
+    Trim webpage content to the model's token budget.
+    The content is tokenized once per page and model; the result is reused.
+    
+    Args:
+        content: Webpage content to send (already capped at fetch time)
+        content_hash: Identity of the content, used to detect a new fetch
+        model: LiteLLM model string
         
-        # Get stored content
-        content = webpage_storage.get("content", "")
+    Returns:
+        Content that fits in the model's context window
+    """
+    cached = webpage_storage.local.get("prompt_content")
+    if cached and cached[0] == content_hash and cached[1] == model:
+        return cached[2]
+    
+    budget = _get_context_budget(model)
+    # Tokenize once and cut at an exact token boundary
+    token_ids = litellm.encode(model=model, text=content)
+    
+    trimmed = content
+    if len(token_ids) > budget:
+        trimmed = litellm.decode(model=model, tokens=token_ids[:budget])
+    
+    webpage_storage.local["prompt_content"] = (content_hash, model, trimmed)
+    return trimmed
+
+
+def _warmup_model():
+    """Send a one-token request so the model weights are loaded and kept resident."""
+    try:
+        litellm.completion(
+            model=LITELLM_MODEL,
+            messages=[{"role": "user", "content": "hi"}],
+            api_base=LITELLM_API_BASE,
+            max_tokens=1,
+            keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+        )
+    except Exception as e:
+        print(f"⚠️ Model warmup failed: {e}")
+
+
+@st.cache_resource
+def _start_model_warmup() -> bool:
+    """
+    Start the model warmup in a daemon thread (once per process).
+    Only Ollama is warmed; hosted providers have no cold start to hide.
+    
+    Returns:
+        True if a warmup was started
+    """
+    if LITELLM_PROVIDER != "ollama":
+        return False
+    
+    threading.Thread(target=_warmup_model, daemon=True).start()
+    return True
+
+
+@st.cache_resource
+def get_embed_batcher() -> EmbedBatcher:
+    """Create the process-wide question embedding batcher."""
+    return EmbedBatcher(
+        model=app_config.Config.EMBED_MODEL,
+        api_base=app_config.Config.MODEL_OPTIONS["ollama"]["base_url"],
+        max_batch=app_config.Config.EMBED_BATCH_MAX,
+        max_wait=app_config.Config.EMBED_BATCH_WAIT_MS / 1000
+    )
+
+
+def _retrieve_context(question: str, content: str, content_hash: str, model: str) -> str:
+    """
+    Get the webpage context to send with a question.
+    Uses the top-k embedded chunks when a retrieval index exists for this
+    content, otherwise the full content trimmed to the model's token budget.
+    
+    Args:
+        question: User's question
+        content: Full webpage content
+        content_hash: Identity of the content
+        model: LiteLLM model string
         
-        # Check if this is a greeting or general question
-        greetings = ['hi', 'hello', 'hey', 'good morning', 'good afternoon', 'good evening']
-        is_greeting = question.lower().strip() in greetings
+    Returns:
+        Context text for the prompt
+    """
+    # The index may be from another page (e.g. another worker fetched over it)
+    index = webpage_storage.local.get("vecs")
+    if index and index[0] == content_hash:
+        _, chunks, vectors = index
+        try:
+            query = get_embed_batcher().embed(question)
+            return "\n\n".join(top_k_chunks(query, chunks, vectors, k=app_config.Config.RETRIEVAL_TOP_K))
+        except Exception as e:
+            print(f"⚠️ Retrieval failed, using full page content: {e}")
+    
+    # Already capped to Config.PROMPT_CONTEXT_CHARS at fetch time
+    prompt_source = webpage_storage.get("content_for_prompt") or content
+    return _trim_content_to_budget(prompt_source, content_hash, model)
+
+
+def _prepare_request(question: str, content: str) -> dict:
+    """
+    Build everything needed to answer a question: model, messages and cache key.
+    
+    Args:
+        question: User's question
+        content: Loaded webpage content ("" if none)
         
-        # Build context-aware prompt
-        if content and not is_greeting:
-            # Include webpage content in the prompt for context-based Q&A
-            full_prompt = f"""Answer the following question based ONLY on the provided webpage content.
+    Returns:
+        dict with model, api_base, messages, cache_key and cached (None);
+        on a cache hit, only {"cached": answer}
+    """
+    # Check if this is a greeting or general question
+    normalized_question = question.strip().casefold()
+    is_greeting = normalized_question in _GREETINGS
+    
+    model, api_base = LITELLM_MODEL, LITELLM_API_BASE
+    
+    # Cache key for a repeated question about the same page
+    cache_key = None
+    if content and not is_greeting:
+        # Hashed once at fetch time; only hash here if content was stored elsewhere
+        content_hash = webpage_storage.get("content_hash")
+        if content_hash is None:
+            content_hash = hashlib.blake2b(content.encode(), digest_size=8).hexdigest()
+        cache_key = (
+            content_hash,
+            normalized_question,
+            model
+        )
+        resp_cache = webpage_storage.local.setdefault("resp_cache", OrderedDict())
+        if cache_key in resp_cache:
+            # Answer from the cache before any context is trimmed or retrieved
+            resp_cache.move_to_end(cache_key)
+            return {"cached": resp_cache[cache_key]}
+    
+    # Build context-aware messages
+    if content and not is_greeting:
+        # The webpage content goes in a stable system prefix and the question in its
+        # own message, so providers with prompt caching can reuse the prefix
+        prompt_content = _retrieve_context(question, content, content_hash, model)
+        system_prompt = f"""Answer the user's question based ONLY on the provided webpage content.
 
 Webpage Content:
-{content[:15000]}
-
-Question: {question}
+{prompt_content}
 
 Please provide a clear, concise answer based only on the information in the webpage content above. If the question cannot be answered from the webpage content, say so."""
-        else:
-            # For greetings or when no content, just use the question as-is
-            if is_greeting:
-                full_prompt = f"{question}\n\nRespond briefly and offer to help answer questions about the loaded webpage."
-            else:
-                full_prompt = question
         
-        # Get model configuration
-        model_provider = os.getenv("MODEL_PROVIDER", "ollama").lower()
-        model_name = os.getenv("MODEL_NAME", "mistral")
+        if LITELLM_PROVIDER == "anthropic":
+            # Mark the system block cacheable for Anthropic prompt caching
+            system_message = {
+                "role": "system",
+                "content": [{
+                    "type": "text",
+                    "text": system_prompt,
+                    "cache_control": {"type": "ephemeral"}
+                }]
+            }
+        else:
+            system_message = {"role": "system", "content": system_prompt}
         
-        # Build model string for LiteLLM
-        if model_provider == "ollama":
-            model = f"ollama_chat/{model_name}"
-            api_base = os.getenv("OLLAMA_API_BASE", "http://localhost:11434")
-        elif model_provider == "openai":
-            model = model_name  # e.g., "gpt-4"
-            api_base = None
-        elif model_provider == "anthropic":
-            model = model_name  # e.g., "claude-3-sonnet-20240229"
-            api_base = None
-        elif model_provider == "gemini":
-            # For Gemini via LiteLLM
-            model = f"gemini/{model_name}"
-            api_base = None
+        messages = [system_message, {"role": "user", "content": question}]
+    else:
+        # For greetings or when no content, just use the question as-is
+        if is_greeting:
+            full_prompt = f"{question}\n\nRespond briefly and offer to help answer questions about the loaded webpage."
         else:
-            model = f"{model_provider}/{model_name}"
-            api_base = None
-        
-        # Call LiteLLM directly - works with all providers
-        response = litellm.completion(
-            model=model,
-            messages=[{"role": "user", "content": full_prompt}],
-            api_base=api_base if api_base else None,
-            temperature=0.7
-        )
+            full_prompt = question
+        messages = [{"role": "user", "content": full_prompt}]
+    
+    return {
+        "model": model,
+        "api_base": api_base,
+        "messages": messages,
+        "cache_key": cache_key,
+        "cached": None
+    }
+
+
+def _store_response(cache_key, answer: str):
+    """Store an LLM answer in the bounded response cache."""
+    if cache_key is None:
+        return
+    
+    resp_cache = webpage_storage.local.setdefault("resp_cache", OrderedDict())
+    resp_cache[cache_key] = answer
+    if len(resp_cache) > RESPONSE_CACHE_MAXSIZE:
+        resp_cache.popitem(last=False)
+
+
+def _completion_kwargs(request: dict) -> dict:
+    """LiteLLM completion arguments for a prepared request (works with all providers)."""
+    return {
+        "model": request["model"],
+        "messages": request["messages"],
+        "api_base": request["api_base"] if request["api_base"] else None,
+        "temperature": 0.7
+    }
+
+
+def _error_message(error: Exception) -> str:
+    """User-facing answer for a failed model call."""
+    return f"Error: {str(error)}\n\nPlease ensure your model provider is running and configured correctly."
+
+
+def stream_agent_with_context(question: str, content: str):
+    """
+    Ask the agent a question with webpage context, streaming the answer for st.write_stream.
+    
+    Args:
+        question: User's question
+        content: Loaded webpage content
         
-        return response.choices[0].message.content
+    Yields:
+        Response text fragments as they are generated
+    """
+    try:
+        request = _prepare_request(question, content)
+        if request["cached"] is not None:
+            yield request["cached"]
+            return
+        
+        response = litellm.completion(**_completion_kwargs(request), stream=True)
+        
+        parts = []
+        for chunk in response:
+            delta = chunk.choices[0].delta.content or ""
+            if delta:
+                parts.append(delta)
+                yield delta
+        
+        _store_response(request["cache_key"], "".join(parts))
         
     except Exception as e:
-        return f"Error: {str(e)}\n\nPlease ensure your model provider is running and configured correctly."
+        yield _error_message(e)
+
+
+async def ask_agent_with_context_async(question: str, content: str) -> str:
+    """
+    Ask the agent a question with webpage context using litellm.acompletion.
+    Lets several questions share the wait on the model provider.
+    
+    Args:
+        question: User's question
+        content: Loaded webpage content
+        
+    Returns:
+        Agent's response
+    """
+    try:
+        # Prepared in a worker thread so concurrent questions can share an embedding batch
+        request = await asyncio.to_thread(_prepare_request, question, content)
+        if request["cached"] is not None:
+            return request["cached"]
+        
+        response = await litellm.acompletion(**_completion_kwargs(request))
+        
+        answer = response.choices[0].message.content
+        _store_response(request["cache_key"], answer)
+        
+        return answer
+        
+    except Exception as e:
+        return _error_message(e)
+
+
+def ask_agent_batch(questions: list[str], content: str) -> list[str]:
+    """
+    Answer several questions concurrently.
+    At most Config.OLLAMA_NUM_PARALLEL requests are in flight, matching the server's slots.
+    Repeated questions are sent once, since concurrent duplicates would all
+    miss the response cache.
+    
+    Args:
+        questions: List of user questions
+        content: Loaded webpage content
+        
+    Returns:
+        List of responses in the same order as questions
+    """
+    async def _gather():
+        semaphore = asyncio.Semaphore(max(app_config.Config.OLLAMA_NUM_PARALLEL, 1))
+        
+        async def _ask(question):
+            async with semaphore:
+                return await ask_agent_with_context_async(question, content)
+        
+        # Same normalization as the response cache key
+        unique = {}
+        for question in questions:
+            unique.setdefault(question.strip().casefold(), question)
+        
+        answers = await asyncio.gather(*[_ask(q) for q in unique.values()])
+        by_key = dict(zip(unique, answers))
+        return [by_key[question.strip().casefold()] for question in questions]
+    
+    return asyncio.run(_gather())
+
+
+@st.fragment
+def render_chat():
+    """Chat history and input; reruns on its own so questions skip the rest of the page"""
+    st.subheader("💬 Ask Questions")
+    
+    # Opt-in, so a multi-line question is otherwise sent as one question
+    queue_lines = st.toggle(
+        "Ask each line as a separate question",
+        key="queue_lines",
+        help="Answers every non-empty line of the message concurrently"
+    )
+
+    # Display chat history
+    if st.session_state.chat_history:
+        for i, (role, message) in enumerate(st.session_state.chat_history):
+            if role == "user":
+                with st.chat_message("user"):
+                    st.write(message)
+            else:
+                with st.chat_message("assistant"):
+                    st.write(message)
+
+    # Chat input
+    if prompt := st.chat_input("Ask a question about the webpage..."):
+        # Read once and passed down, so a question costs one storage read
+        content = webpage_storage.get("content", "")
+        if not content:
+            st.warning("⚠️ Please fetch a webpage first before asking questions!")
+        else:
+            questions = [prompt]
+            if queue_lines:
+                # Each non-empty line is a separate queued question
+                questions = [line.strip() for line in prompt.splitlines() if line.strip()] or [prompt]
+        
+            if len(questions) > 1:
+                # Answer all queued questions concurrently
+                with st.spinner(f"Thinking about {len(questions)} questions..."):
+                    responses = ask_agent_batch(questions, content)
+            else:
+                responses = None
+        
+            for index, question in enumerate(questions):
+                # Add user message to history
+                st.session_state.chat_history.append(("user", question))
+            
+                # Display user message
+                with st.chat_message("user"):
+                    st.write(question)
+            
+                # Get agent response using direct Ollama
+                with st.chat_message("assistant"):
+                    if responses is not None:
+                        response = responses[index]
+                        st.write(response)
+                    else:
+                        # Stream tokens as they arrive
+                        response = st.write_stream(stream_agent_with_context(question, content))
+                    st.session_state.chat_history.append(("assistant", response))
 
 
 def main():
@@ -193,9 +541,12 @@ def main():
         
         # ADK info
         st.subheader("ADK Framework")
-        st.success("✅ Google ADK Active")
-        if st.session_state.get("adk_session_id"):
-            st.caption(f"Session: {st.session_state.adk_session_id[:8]}...")
+        if app_config.Config.USE_ADK_RUNNER:
+            st.success("✅ Google ADK Active")
+            if st.session_state.get("adk_session_id"):
+                st.caption(f"Session: {st.session_state.adk_session_id[:8]}...")
+        else:
+            st.info("ADK Runner off (set USE_ADK_RUNNER=true)")
         
         st.divider()
         
@@ -228,36 +579,52 @@ def main():
         # Fetch button
         if st.button("🔍 Fetch Page", type="primary"):
             if url_input:
-                with st.spinner("Fetching webpage..."):
+                with st.status("Fetching webpage...") as fetch_status:
                     try:
-                        # Directly call the fetch function (bypassing the agent for this step)
-                        result = fetch_and_store_webpage(url_input)
+                        # Directly call the fetch function (bypassing the agent for this step),
+                        # on a worker thread so the fetch completes even if this run is interrupted
+                        future = get_fetch_executor().submit(fetch_and_store_webpage, url_input)
+                        started = time.monotonic()
+                        while not future.done():
+                            time.sleep(0.1)
+                            fetch_status.update(label=f"Fetching webpage... {time.monotonic() - started:.1f}s")
+                        result = future.result()
+                        
+                        fetch_status.update(
+                            label="Webpage fetched" if result["status"] == "success" else "Fetch failed",
+                            state="complete" if result["status"] == "success" else "error"
+                        )
                         
                         if result["status"] == "success":
-                            st.success(f"✅ Fetched {result['word_count']} words from webpage")
+                            st.success(f"✅ {result['message']}")
                             st.text_area("Preview", result['content'][:500], height=150)
                         else:
                             st.error(f"❌ Failed to fetch: {result['message']}")
                             
                     except Exception as e:
+                        fetch_status.update(label="Fetch failed", state="error")
                         st.error(f"Error: {str(e)}")
             else:
                 st.warning("Please enter a URL")
     
+    # Read once per rerun (after any fetch above); each get is a Redis round trip
+    content = webpage_storage.get("content")
+    
     with col2:
         st.subheader("📊 Status")
-        if webpage_storage.get("content"):
+        if content:
             st.metric("Words Loaded", webpage_storage.get("word_count", 0))
             st.metric("URL", "✅ Loaded")
-            if webpage_storage.get("url"):
-                st.caption(webpage_storage["url"][:50] + "...")
+            url = webpage_storage.get("url")
+            if url:
+                st.caption(url[:50] + "...")
         else:
             st.info("No webpage loaded yet")
     
     # Content preview
-    if webpage_storage.get("content"):
+    if content:
         with st.expander("📄 Webpage Content Preview"):
-            preview = get_content_preview(webpage_storage["content"], max_chars=1000)
+            preview = get_content_preview(content, max_chars=1000)
             st.text_area(
                 "Content:",
                 value=preview,
@@ -268,37 +635,7 @@ def main():
     st.divider()
     
     # Chat interface
-    st.subheader("💬 Ask Questions")
-    
-    # Display chat history
-    if st.session_state.chat_history:
-        for i, (role, message) in enumerate(st.session_state.chat_history):
-            if role == "user":
-                with st.chat_message("user"):
-                    st.write(message)
-            else:
-                with st.chat_message("assistant"):
-                    st.write(message)
-    
-    # Chat input
-    if prompt := st.chat_input("Ask a question about the webpage..."):
-        if not webpage_storage.get("content"):
-            st.warning("⚠️ Please fetch a webpage first before asking questions!")
-        else:
-            # Add user message to history
-            st.session_state.chat_history.append(("user", prompt))
-            
-            # Display user message
-            with st.chat_message("user"):
-                st.write(prompt)
-            
-            # Get agent response using direct Ollama
-            with st.chat_message("assistant"):
-                with st.spinner("Thinking..."):
-                    response = ask_agent_with_context(prompt)
-                    st.write(response)
-                    st.session_state.chat_history.append(("assistant", response))
-
+    render_chat()
 
 if __name__ == "__main__":
     main()
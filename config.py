@@ -4,11 +4,14 @@ Handles environment variables and model configurations.
 """
 
 import os
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
+# Load environment variables from .env files before the Config attributes below
+# read them (once per process; existing variables take precedence)
 load_dotenv()
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "adk_agent", ".env"))
 
 
 class Config:
@@ -59,6 +62,15 @@ class Config:
         }
     }
     
+    # LiteLLM routing per provider: model name -> (LiteLLM model string, API base)
+    LITELLM_DISPATCH = {
+        # ollama_chat provider for better compatibility
+        "ollama": lambda name: (f"ollama_chat/{name}", os.getenv("OLLAMA_API_BASE", "http://localhost:11434")),
+        "openai": lambda name: (name, None),      # e.g., "gpt-4"
+        "anthropic": lambda name: (name, None),   # e.g., "claude-3-sonnet-20240229"
+        "gemini": lambda name: (f"gemini/{name}", None),
+    }
+    
     # Default settings (backwards compatibility)
     DEFAULT_MODEL_BACKEND = MODEL_PROVIDER
     DEFAULT_MODEL_NAME = MODEL_NAME
@@ -67,15 +79,49 @@ class Config:
     MAX_WORDS = int(os.getenv("MAX_WORDS", "25000"))
     REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "30"))
     
+    # Persistent page cache settings
+    PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", "webcache.db")
+    PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "3600"))  # Seconds
+    
+    # Embedding retrieval settings (Ollama /api/embed)
+    USE_RETRIEVAL = os.getenv("USE_RETRIEVAL", "false").lower() == "true"
+    EMBED_MODEL = os.getenv("EMBED_MODEL", "nomic-embed-text")
+    RETRIEVAL_CHUNK_WORDS = int(os.getenv("RETRIEVAL_CHUNK_WORDS", "80"))
+    RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "5"))
+    EMBED_BATCH_MAX = int(os.getenv("EMBED_BATCH_MAX", "16"))
+    EMBED_BATCH_WAIT_MS = int(os.getenv("EMBED_BATCH_WAIT_MS", "50"))
+    
+    # Shared webpage storage (in-memory when unset)
+    REDIS_URL = os.getenv("REDIS_URL")
+    
+    # Concurrent requests sent to the model server (match Ollama's OLLAMA_NUM_PARALLEL)
+    OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+    
     # ADK Agent settings
     DEFAULT_TEMPERATURE = float(os.getenv("TEMPERATURE", "0.2"))
     DEFAULT_MAX_TOKENS = int(os.getenv("MAX_OUTPUT_TOKENS", "2048"))
     CONTEXT_WINDOW = int(os.getenv("CONTEXT_WINDOW", "32768"))
+    # Characters of page content sent to the LLM, cut once at fetch time (0 = no cap);
+    # the prompt is further trimmed to the model's token budget
+    PROMPT_CONTEXT_CHARS = int(os.getenv("PROMPT_CONTEXT_CHARS", "15000"))
     
     # ADK Session settings
     APP_NAME = "WebCrawlerADKChatAgent"
     AGENT_NAME = "web_chat_agent"
     AGENT_DESCRIPTION = "AI assistant that answers questions based on crawled webpage content"
+    # The chat path calls LiteLLM directly; the ADK Runner is only created when enabled
+    USE_ADK_RUNNER = os.getenv("USE_ADK_RUNNER", "false").lower() == "true"
+    
+    @classmethod
+    def get_litellm_model(cls, backend: str, model_name: str) -> Tuple[str, Optional[str]]:
+        """
+        Get the LiteLLM model string and API base for a backend.
+        Unknown backends use the generic "<backend>/<model>" format.
+        """
+        route = cls.LITELLM_DISPATCH.get(backend)
+        if route is None:
+            return f"{backend}/{model_name}", None
+        return route(model_name)
     
     @classmethod
     def get_model_options(cls, backend: str) -> List[str]:
@@ -85,20 +131,18 @@ class Config:
     @classmethod
     def get_default_model(cls, backend: str) -> str:
         """Get default model for a backend."""
-        return cls.MODEL_OPTIONS.get(backend, {}).get("default", "")
+        return _get_default_model(backend)
     
     @classmethod
     def requires_api_key(cls, backend: str) -> bool:
         """Check if backend requires API key."""
-        return cls.MODEL_OPTIONS.get(backend, {}).get("requires_api_key", False)
+        return _requires_api_key(backend)
     
     @classmethod
     def get_api_key(cls, backend: str) -> str:
         """Get API key for a backend."""
-        if not cls.requires_api_key(backend):
-            return None
-        
-        env_var = cls.MODEL_OPTIONS.get(backend, {}).get("api_key_env")
+        # The env var name is cached; its value is read live so a key set later is seen
+        env_var = _api_key_env(backend)
         return os.getenv(env_var) if env_var else None
     
     @classmethod
@@ -115,10 +159,10 @@ class Config:
                 "message": f"Invalid backend: {backend}"
             }
         
-        if cls.requires_api_key(backend):
+        if _requires_api_key(backend):
             api_key = cls.get_api_key(backend)
             if not api_key:
-                env_var = cls.MODEL_OPTIONS[backend]["api_key_env"]
+                env_var = _api_key_env(backend)
                 return {
                     "valid": False,
                     "message": f"API key not found. Please set {env_var} in .env file"
@@ -130,6 +174,25 @@ class Config:
         }
 
 
+# Backend lookups are pure functions of the backend name; cache them outside the
+# class so the classmethods above stay as thin, API-compatible shims
+@lru_cache(maxsize=8)
+def _get_default_model(backend: str) -> str:
+    return Config.MODEL_OPTIONS.get(backend, {}).get("default", "")
+
+
+@lru_cache(maxsize=8)
+def _requires_api_key(backend: str) -> bool:
+    return Config.MODEL_OPTIONS.get(backend, {}).get("requires_api_key", False)
+
+
+@lru_cache(maxsize=8)
+def _api_key_env(backend: str) -> Optional[str]:
+    if not _requires_api_key(backend):
+        return None
+    return Config.MODEL_OPTIONS.get(backend, {}).get("api_key_env")
+
+
 # System prompt for the ADK agent
 SYSTEM_PROMPT = """You are a helpful AI assistant that answers questions based ONLY on the provided webpage content.
 
@@ -0,0 +1,114 @@
+"""
+Persistent cache for fetched webpage content.
+Backed by SQLite so fetches survive app restarts and are shared between sessions.
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# URL patterns mapped to cache lifetimes in seconds, first match wins.
+# URLs matching no rule use the cache's default TTL.
+_TTL_RULES = [
+    (re.compile(r"wikipedia\.org"), 86400 * 7),  # Reference pages change rarely
+    (re.compile(r"news|blog|reddit"), 300),       # Frequently updated pages
+]
+
+
+class PageCache:
+    """SQLite-backed cache of fetched webpages keyed by URL hash."""
+    
+    def __init__(self, path: str = "webcache.db", ttl: int = 3600):
+        """
+        Open (or create) the cache database.
+        
+        Args:
+            path: SQLite database file path
+            ttl: Default seconds a cached page stays fresh (default: 1 hour)
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS pages (
+                url_hash TEXT PRIMARY KEY,
+                url TEXT,
+                content TEXT,
+                word_count INTEGER,
+                fetched_at REAL,
+                expires_at REAL
+            )"""
+        )
+        # Databases created before per-URL TTLs lack expires_at
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        if "expires_at" not in columns:
+            self._conn.execute("ALTER TABLE pages ADD COLUMN expires_at REAL")
+        self._conn.commit()
+    
+    @staticmethod
+    def _hash_url(url: str) -> str:
+        """Hash a URL into the cache key."""
+        return hashlib.sha1(url.encode()).hexdigest()
+    
+    def ttl_for(self, url: str) -> int:
+        """
+        Get the cache lifetime for a URL from the URL-pattern rules.
+        
+        Args:
+            url: The webpage URL
+        
+        Returns:
+            TTL in seconds
+        """
+        for pattern, ttl in _TTL_RULES:
+            if pattern.search(url):
+                return ttl
+        return self.ttl
+    
+    def get(self, url: str) -> Optional[dict]:
+        """
+        Get a cached page if it is still fresh.
+        
+        Args:
+            url: The webpage URL
+        
+        Returns:
+            dict with url, content and word_count, or None on miss/stale entry
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, content, word_count, expires_at FROM pages WHERE url_hash = ?",
+                (self._hash_url(url),)
+            ).fetchone()
+        
+        if row is None or row[3] is None or time.time() >= row[3]:
+            return None
+        
+        return {"url": row[0], "content": row[1], "word_count": row[2]}
+    
+    def set(self, url: str, content: str, word_count: int):
+        """
+        Store a fetched page.
+        
+        Args:
+            url: The webpage URL
+            content: Cleaned webpage content
+            word_count: Number of words in content
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url_hash, url, content, word_count, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self._hash_url(url), url, content, word_count, now, now + self.ttl_for(url))
+            )
+            self._conn.commit()
+    
+    def clear(self):
+        """Remove all cached pages."""
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.commit()
@@ -56,9 +56,13 @@ pip install -q -r ADK_VERSION_requirements.txt
 echo "✅ Dependencies installed"
 echo ""
 
-# Set environment variable
+# Set environment variables
 export OLLAMA_API_BASE=http://localhost:11434
 echo "✅ Environment variable set: OLLAMA_API_BASE=$OLLAMA_API_BASE"
+export OLLAMA_NUM_PARALLEL=${OLLAMA_NUM_PARALLEL:-4}
+echo "✅ Environment variable set: OLLAMA_NUM_PARALLEL=$OLLAMA_NUM_PARALLEL"
+export OLLAMA_KEEP_ALIVE=${OLLAMA_KEEP_ALIVE:-30m}
+echo "✅ Environment variable set: OLLAMA_KEEP_ALIVE=$OLLAMA_KEEP_ALIVE"
 echo ""
 
 # Start Ollama in background if not running
@@ -0,0 +1,183 @@
+"""
+Embedding-based retrieval over webpage chunks.
+Uses Ollama's batched /api/embed endpoint so a page is embedded in one request.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from typing import TYPE_CHECKING
+
+from web_utils import prepare_for_embedding
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# numpy and requests are imported on first use so importing this module
+# at app startup doesn't load them
+_numpy = None  # numpy module, None until first needed
+# Pooled session so repeat /api/embed calls reuse their connection to Ollama
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_numpy():
+    """Return the numpy module, importing it on first use."""
+    global _numpy
+    if _numpy is None:
+        import numpy
+        _numpy = numpy
+    return _numpy
+
+
+def _get_session():
+    """Return the shared embedding session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                _session = requests.Session()
+    return _session
+
+
+def embed_texts(texts: list[str], model: str, api_base: str, timeout: int = 60) -> "np.ndarray":
+    """
+    Embed a batch of texts with a single Ollama /api/embed call.
+    
+    Args:
+        texts: Texts to embed
+        model: Ollama embedding model (e.g. nomic-embed-text)
+        api_base: Ollama server URL
+        timeout: Request timeout in seconds
+    
+    Returns:
+        Array of shape (len(texts), dim) with L2-normalized rows
+    
+    Raises:
+        ValueError: If the server returns a different number of embeddings than texts
+    """
+    np = _get_numpy()
+    response = _get_session().post(
+        f"{api_base.rstrip('/')}/api/embed",
+        json={"model": model, "input": texts},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    
+    vectors = np.asarray(response.json()["embeddings"], dtype=np.float32)
+    if len(vectors) != len(texts):
+        raise ValueError(f"Expected {len(texts)} embeddings from {api_base}, got {len(vectors)}")
+    
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def build_index(content: str, model: str, api_base: str, chunk_words: int = 80) -> tuple[list[str], "np.ndarray"]:
+    """
+    Split content into chunks and embed them.
+    
+    Args:
+        content: Full webpage content
+        model: Ollama embedding model
+        api_base: Ollama server URL
+        chunk_words: Words per chunk
+    
+    Returns:
+        Tuple of (chunks, embeddings)
+    """
+    chunks = prepare_for_embedding(content, chunk_size=chunk_words)
+    return chunks, embed_texts(chunks, model, api_base)
+
+
+def top_k_chunks(query: "np.ndarray", chunks: list[str], vectors: "np.ndarray", k: int = 5) -> list[str]:
+    """
+    Get the chunks most similar to a query embedding.
+    
+    Args:
+        query: Normalized embedding of the question
+        chunks: Indexed chunks
+        vectors: Chunk embeddings from build_index
+        k: Number of chunks to return
+    
+    Returns:
+        Top-k chunks in their original page order
+    """
+    if len(chunks) <= k:
+        return chunks
+    
+    scores = vectors @ query
+    top = _get_numpy().argpartition(scores, -k)[-k:]
+    return [chunks[i] for i in sorted(top)]
+
+
+class EmbedBatcher:
+    """
+    Collects concurrent embedding requests into batched /api/embed calls.
+    
+    A background thread waits for the first request, then gathers more for up
+    to max_wait seconds (or until max_batch requests) and embeds them together.
+    """
+    
+    def __init__(self, model: str, api_base: str, max_batch: int = 16, max_wait: float = 0.05,
+                 timeout: int = 60):
+        """
+        Args:
+            model: Ollama embedding model
+            api_base: Ollama server URL
+            max_batch: Maximum texts per /api/embed call
+            max_wait: Seconds to wait for more requests after the first one
+            timeout: /api/embed request timeout in seconds
+        """
+        self.model = model
+        self.api_base = api_base
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+    
+    def embed(self, text: str) -> "np.ndarray":
+        """
+        Embed one text, sharing the request with other concurrent callers.
+        
+        Args:
+            text: Text to embed
+        
+        Returns:
+            Normalized embedding vector
+        
+        Raises:
+            TimeoutError: If no embedding arrives in time
+        """
+        future = Future()
+        self._queue.put((future, text))
+        # Allow for the batch ahead of this one plus its own request
+        return future.result(timeout=2 * self.timeout + self.max_wait)
+    
+    def _run(self):
+        """Worker loop: collect a batch, embed it, resolve the futures."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            try:
+                vectors = embed_texts([text for _, text in batch], self.model, self.api_base, self.timeout)
+            except Exception as e:
+                for future, _ in batch:
+                    future.set_exception(e)
+                continue
+            
+            for (future, _), vector in zip(batch, vectors):
+                future.set_result(vector)
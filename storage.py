@@ -0,0 +1,106 @@
+"""
+Storage for the currently loaded webpage.
+Uses Redis when REDIS_URL is set so all app workers see the same page,
+otherwise falls back to an in-process dict.
+"""
+
+import json
+from typing import Any, Optional
+
+
+class InMemoryBackend:
+    """Process-local dict backend (default)."""
+    
+    def __init__(self):
+        self._data = {}
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._data.get(key, default)
+    
+    def set(self, key: str, value: Any):
+        self._data[key] = value
+    
+    def update(self, values: dict):
+        self._data.update(values)
+    
+    def clear(self):
+        self._data.clear()
+
+
+class RedisBackend:
+    """Redis backend shared across worker processes and restarts."""
+    
+    def __init__(self, url: str, prefix: str = "webpage:"):
+        """
+        Connect to Redis.
+        
+        Args:
+            url: Redis connection URL (e.g. redis://localhost:6379/0)
+            prefix: Key prefix used for all stored values
+        """
+        import redis  # Optional dependency, only needed when REDIS_URL is set
+        
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._prefix = prefix
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._redis.get(self._prefix + key)
+        return json.loads(value) if value is not None else default
+    
+    def set(self, key: str, value: Any):
+        # Values are JSON-encoded so ints and strings round-trip unchanged
+        self._redis.set(self._prefix + key, json.dumps(value))
+    
+    def update(self, values: dict):
+        # Single MSET so readers never see a half-written page
+        self._redis.mset({self._prefix + key: json.dumps(value) for key, value in values.items()})
+    
+    def clear(self):
+        keys = list(self._redis.scan_iter(match=self._prefix + "*"))
+        if keys:
+            self._redis.delete(*keys)
+
+
+class WebpageStorage:
+    """
+    Storage for the loaded webpage (url, content, word_count, ...).
+    
+    Shared values go through the backend. Derived, process-local state that
+    is not JSON-serializable (e.g. response caches) lives in `local`.
+    """
+    
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else InMemoryBackend()
+        self.local = {}
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a stored value."""
+        return self.backend.get(key, default)
+    
+    def set(self, key: str, value: Any):
+        """Store a value."""
+        self.backend.set(key, value)
+    
+    def update(self, **values):
+        """Store several values in one backend write."""
+        self.backend.update(values)
+    
+    def clear(self):
+        """Remove all stored values, shared and process-local."""
+        self.backend.clear()
+        self.local.clear()
+
+
+def create_storage(redis_url: Optional[str] = None) -> WebpageStorage:
+    """
+    Create webpage storage, using Redis if a URL is given.
+    
+    Args:
+        redis_url: Redis connection URL, or None for in-memory storage
+    
+    Returns:
+        WebpageStorage instance
+    """
+    if redis_url:
+        return WebpageStorage(RedisBackend(redis_url))
+    return WebpageStorage()
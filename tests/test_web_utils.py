@@ -0,0 +1,82 @@
+"""
+Tests for HTML text extraction in web_utils.
+"""
+
+import codecs
+
+import pytest
+
+import web_utils
+
+TEXT = "Crème brûlée 日本 and a few more words"
+
+
+@pytest.fixture(params=["selectolax", "lxml"])
+def parser(request, monkeypatch):
+    """Run each test against both parser paths."""
+    if request.param == "selectolax":
+        if web_utils._get_html_parser() is None:
+            pytest.skip("selectolax not installed")
+    else:
+        monkeypatch.setattr(web_utils, "_html_parser", False)
+    return request.param
+
+
+def test_undeclared_utf8_is_not_decoded_as_latin1(parser):
+    # Content-Type without charset and no <meta charset>
+    html = f"<html><body><p>{TEXT}</p></body></html>".encode("utf-8")
+
+    title, text = web_utils.extract_text_and_title([html])
+
+    assert title == "No title"
+    assert text == TEXT
+
+
+def test_undeclared_charset_uses_meta_charset(parser):
+    html = f'<html><head><meta charset="euc-jp"><title>{TEXT}</title></head><body><p>{TEXT}</p></body></html>'
+
+    title, text = web_utils.extract_text_and_title([html.encode("euc_jp")])
+
+    assert title == TEXT
+    assert text == TEXT
+
+
+def test_undeclared_charset_strips_utf8_bom(parser):
+    html = codecs.BOM_UTF8 + f"<p>{TEXT}</p>".encode("utf-8")
+
+    assert web_utils.extract_text_and_title([html])[1] == TEXT
+
+
+def test_undeclared_non_utf8_falls_back_to_windows_1252(parser):
+    html = "<p>Größe und Äpfel über alles</p>".encode("cp1252")
+
+    assert web_utils.extract_text_and_title([html])[1] == "Größe und Äpfel über alles"
+
+
+def test_declared_charset_with_multibyte_split_across_chunks(parser):
+    html = f"<p>{TEXT}</p>".encode("utf-8")
+    chunks = [html[i:i + 3] for i in range(0, len(html), 3)]
+
+    assert web_utils.extract_text_and_title(chunks, "utf-8")[1] == TEXT
+
+
+def test_error_response_is_closed(monkeypatch):
+    requests = pytest.importorskip("requests")
+
+    class ErrorResponse(requests.Response):
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    response = ErrorResponse()
+    response.status_code, response.reason = 404, "Not Found"
+
+    class Session:
+        def get(self, *args, **kwargs):
+            return response
+
+    monkeypatch.setattr(web_utils, "_get_session", Session)
+
+    assert web_utils.fetch_webpage_content("https://example.com/missing") == (False, "HTTP error occurred: 404 - Not Found")
+    assert response.closed
@@ -14,15 +14,16 @@ def check_imports():
     required_packages = [
         ("streamlit", "Streamlit UI framework"),
         ("requests", "HTTP library for web scraping"),
-        ("bs4", "BeautifulSoup for HTML parsing"),
+        ("lxml", "HTML parser"),
         ("google.adk", "Google Agent Development Kit"),
         ("google.genai", "Google Generative AI"),
         ("dotenv", "Environment variable management"),
     ]
     
     optional_packages = [
-        ("lxml", "Fast XML/HTML parser"),
+        ("selectolax.lexbor", "Faster HTML parser (used instead of lxml)"),
         ("html2text", "HTML to text conversion"),
+        ("redis", "Shared webpage storage (REDIS_URL)"),
     ]
     
     all_good = True
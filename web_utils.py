@@ -2,11 +2,275 @@
 Web scraping utilities for fetching and cleaning webpage content.
 """
 
-import requests
-from bs4 import BeautifulSoup
-from typing import Optional, Tuple
+import codecs
+import threading
+from collections import OrderedDict
+
+from typing import TYPE_CHECKING, Iterable, Optional, Tuple
 import re
 
+if TYPE_CHECKING:
+    import requests
+
+# requests, numpy, lxml and selectolax are imported on first use so loading
+# this module (and the app that imports it) doesn't pay for them up front
+_requests = None  # requests module, None until first needed
+_session = None
+_session_lock = threading.Lock()
+_html_parser = None  # selectolax LexborHTMLParser, False if unavailable; None until checked
+
+# Headers sent with every fetch to mimic a browser
+_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+
+def _get_requests():
+    """Return the requests module, importing it on first use."""
+    global _requests
+    if _requests is None:
+        import requests
+        _requests = requests
+    return _requests
+
+
+def _create_session() -> "requests.Session":
+    """Create an HTTP session with keep-alive connection pooling and retries."""
+    requests = _get_requests()
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=Retry(total=2, backoff_factor=0.3)
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _get_session() -> "requests.Session":
+    """Return the shared session so repeat fetches reuse TCP/TLS connections."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+def _get_html_parser():
+    """Return selectolax's C-backed Lexbor parser, or None if not installed."""
+    global _html_parser
+    if _html_parser is None:
+        try:
+            # selectolax.parser (the Modest backend) raises ImportError since 1.0
+            from selectolax.lexbor import LexborHTMLParser as HTMLParser
+        except ImportError:
+            HTMLParser = False
+        _html_parser = HTMLParser
+    return _html_parser or None
+
+# Parsed pages by (url, max_words) with their validators, for conditional GETs:
+# (etag, last_modified, content), most recently used last
+_VALIDATOR_CACHE_MAXSIZE = 128
+_validator_cache: "OrderedDict[Tuple[str, int], Tuple[Optional[str], Optional[str], str]]" = OrderedDict()
+_validator_lock = threading.Lock()
+
+# Runs of whitespace (including newlines), collapsed to a single space
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# ASCII whitespace bytes, used to find word boundaries in encoded text
+_WHITESPACE_BYTES = b' \t\n\r\x0b\x0c'
+
+# Special characters removed from text (basic punctuation is kept)
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s\.\,\!\?\;\:\-\(\)\[\]\'\"\n]')
+
+# Same filter as a str.translate table for ASCII text (a single C pass);
+# non-ASCII text still goes through the regex, since \w spans all of Unicode
+_SPECIAL_CHARS_TABLE = {code: None for code in range(128) if _SPECIAL_CHARS_RE.match(chr(code))}
+
+# Non-content elements removed before extracting text
+_STRIP_TAGS = ['script', 'style', 'head', 'title', 'meta', 'noscript', 'header', 'footer', 'nav', 'aside']
+_STRIP_TAG_SET = frozenset(_STRIP_TAGS)
+_STRIP_SELECTOR = ','.join(_STRIP_TAGS)
+
+# Bytes read from the response per chunk
+_CHUNK_SIZE = 65536
+
+
+def _drop_element(element):
+    """Remove an element from its tree, keeping the text that follows it."""
+    parent = element.getparent()
+    if parent is None:
+        return
+    
+    if element.tail:
+        previous = element.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or '') + ' ' + element.tail
+        else:
+            parent.text = (parent.text or '') + ' ' + element.tail
+    
+    parent.remove(element)
+
+
+def _charset_from_content_type(content_type: str) -> Optional[str]:
+    """
+    Get the charset declared in a Content-Type header, if any.
+    
+    Args:
+        content_type: Content-Type header value (e.g. "text/html; charset=utf-8")
+    
+    Returns:
+        Charset name, or None when the header declares no (known) charset
+    """
+    for param in content_type.split(';')[1:]:
+        name, _, value = param.partition('=')
+        if name.strip().lower() == 'charset':
+            charset = value.strip().strip('"\'')
+            try:
+                return codecs.lookup(charset).name if charset else None
+            except LookupError:
+                return None  # Unknown charset, let the parser detect it
+    return None
+
+
+# <meta charset=...> or <meta http-equiv=... content="...; charset=...">
+_META_CHARSET_RE = re.compile(rb'<meta[^>]*?charset\s*=\s*["\']?\s*([a-zA-Z0-9_:.\-]+)', re.IGNORECASE)
+
+# Bytes scanned for a <meta> charset, as in the HTML spec's prescan
+_META_PRESCAN_BYTES = 1024
+
+_BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+
+
+def _detect_encoding(html: bytes) -> str:
+    """
+    Detect the charset of an HTML document whose server declared none.
+    Tries a BOM, then a <meta> charset, then strict UTF-8, then
+    charset_normalizer, falling back to windows-1252.
+    
+    Args:
+        html: Raw HTML bytes
+    
+    Returns:
+        Python codec name
+    """
+    for bom, name in _BOMS:
+        if html.startswith(bom):
+            return name
+    
+    match = _META_CHARSET_RE.search(html[:_META_PRESCAN_BYTES])
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode('ascii')).name
+        except LookupError:
+            pass  # Unknown charset, keep detecting
+    
+    try:
+        html.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    
+    from charset_normalizer import from_bytes
+    
+    best = from_bytes(html).best()
+    if best is None or 'cp1252' in best.could_be_from_charset:
+        # windows-1252 is the web's default for undeclared legacy pages
+        return 'cp1252'
+    return best.encoding
+
+
+def _parse_incremental(chunks: Iterable[bytes], encoding: str) -> Tuple[str, str]:
+    """
+    Parse HTML chunk by chunk with lxml's pull parser.
+    Non-content elements are dropped as soon as they close, so they never
+    accumulate in the tree and the raw body is never buffered whole.
+    Chunks are decoded in Python, so any codec name Python knows works
+    (libxml2 rejects names like "euc_jp").
+    """
+    from lxml import etree
+    
+    parser = etree.HTMLPullParser(
+        events=('end',),
+        remove_comments=True,
+        remove_pis=True
+    )
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    title_text = ""
+    
+    def drain():
+        nonlocal title_text
+        for _, element in parser.read_events():
+            if element.tag not in _STRIP_TAG_SET:
+                continue
+            if element.tag == 'title' and not title_text:
+                title_text = ''.join(element.itertext()).strip()
+            _drop_element(element)
+    
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk))
+        drain()
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        parser.feed(tail)
+    root = parser.close()
+    drain()
+    
+    body = root.find('body') if root is not None else None
+    if body is None:
+        body = root
+    text = ' '.join(piece.strip() for piece in body.itertext() if piece.strip()) if body is not None else ""
+    
+    return title_text, text
+
+
+def extract_text_and_title(chunks: Iterable[bytes], encoding: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Extract the page title and visible text from raw HTML.
+    Uses selectolax when installed, otherwise lxml's incremental parser.
+    
+    Args:
+        chunks: Raw HTML as an iterable of byte chunks (e.g. response.iter_content())
+        encoding: Charset declared by the server; detected from the document if None
+    
+    Returns:
+        Tuple of (title: str, text: str); title is "No title" if missing
+    """
+    if encoding is None:
+        # Neither parser reliably sniffs undeclared UTF-8 (lxml assumes
+        # Latin-1), so buffer the document once and detect its charset
+        html = b''.join(chunks)
+        encoding = _detect_encoding(html)
+        chunks = (html,)
+    
+    HTMLParser = _get_html_parser()
+    if HTMLParser is not None:
+        # selectolax needs the whole document; join the chunks into one buffer
+        # Decode once with the known charset instead of letting the parser sniff it
+        html = b''.join(chunks).decode(encoding, errors='replace')
+        tree = HTMLParser(html)
+        
+        # One selector pass both finds the <title> and the boilerplate to strip;
+        # the title is read before <head> (its parent) is decomposed
+        stripped = tree.css(_STRIP_SELECTOR)
+        page_title = next((node for node in stripped if node.tag == 'title'), None)
+        title_text = page_title.text(strip=True) if page_title is not None else ""
+        
+        for node in stripped:
+            node.decompose()
+        
+        root = tree.body if tree.body is not None else tree.root
+        text = root.text(separator=' ', strip=True) if root is not None else ""
+    else:
+        title_text, text = _parse_incremental(chunks, encoding)
+    
+    return title_text or "No title", text
+
 
 def fetch_webpage_content(url: str, max_words: int = 25000, timeout: int = 30) -> Tuple[bool, str]:
     """
@@ -21,27 +285,48 @@ def fetch_webpage_content(url: str, max_words: int = 25000, timeout: int = 30) -
         Tuple of (success: bool, content: str)
         If success is False, content contains the error message
     """
+    requests = _get_requests()
+    
     try:
         # Validate URL
         if not url.startswith(('http://', 'https://')):
             return False, "Invalid URL. Please include http:// or https://"
         
-        # Fetch webpage with headers to mimic browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
+        # Revalidate a previously parsed copy instead of re-downloading it
+        cache_key = (url, max_words)
+        with _validator_lock:
+            cached = _validator_cache.get(cache_key)
         
-        # Parse HTML
-        soup = BeautifulSoup(response.content, 'lxml')
+        # Fetch webpage with headers to mimic browser
+        headers = _HEADERS
+        if cached:
+            headers = dict(_HEADERS)
+            if cached[0]:
+                headers['If-None-Match'] = cached[0]
+            if cached[1]:
+                headers['If-Modified-Since'] = cached[1]
         
-        # Remove script, style, and other non-content elements
-        for element in soup(['script', 'style', 'head', 'title', 'meta', '[document]', 'noscript', 'header', 'footer', 'nav', 'aside']):
-            element.decompose()
+        response = _get_session().get(url, headers=headers, timeout=timeout, stream=True)
         
-        # Extract visible text
-        text = soup.get_text(separator=' ', strip=True)
+        # Closing the response (on every path, errors included) returns its connection to the pool
+        with response:
+            if cached and response.status_code == 304:
+                # Unchanged since the last fetch, nothing to download or parse
+                with _validator_lock:
+                    _validator_cache.move_to_end(cache_key)
+                return True, cached[2]
+            
+            response.raise_for_status()
+            
+            if cached:
+                # A fresh copy supersedes the cached one; its validators (if any) are stored below
+                with _validator_lock:
+                    _validator_cache.pop(cache_key, None)
+            
+            # Parse raw bytes while they download, using the declared charset
+            # (detected from the body when the server declares none)
+            encoding = _charset_from_content_type(response.headers.get('Content-Type', ''))
+            title_text, text = extract_text_and_title(response.iter_content(_CHUNK_SIZE), encoding)
         
         # Clean up the text
         text = clean_text(text)
@@ -56,15 +341,21 @@ def fetch_webpage_content(url: str, max_words: int = 25000, timeout: int = 30) -
             return False, "No meaningful content found on the webpage."
         
         # Add metadata
-        page_title = soup.find('title')
-        title_text = page_title.get_text().strip() if page_title else "No title"
-        
         content = f"Page Title: {title_text}\n"
         content += f"URL: {url}\n"
         content += f"Word Count: {len(text.split())} words\n"
         content += f"{'-' * 80}\n\n"
         content += text
         
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            with _validator_lock:
+                _validator_cache[cache_key] = (etag, last_modified, content)
+                _validator_cache.move_to_end(cache_key)
+                if len(_validator_cache) > _VALIDATOR_CACHE_MAXSIZE:
+                    _validator_cache.popitem(last=False)
+        
         return True, content
         
     except requests.exceptions.Timeout:
@@ -93,14 +384,14 @@ def clean_text(text: str) -> str:
     Returns:
         Cleaned text
     """
-    # Replace multiple spaces with single space
-    text = re.sub(r'\s+', ' ', text)
-    
-    # Remove excessive newlines
-    text = re.sub(r'\n\s*\n', '\n\n', text)
+    # Collapse all whitespace runs (newlines included) to a single space
+    text = _WHITESPACE_RE.sub(' ', text)
     
     # Remove special characters but keep basic punctuation
-    text = re.sub(r'[^\w\s\.\,\!\?\;\:\-\(\)\[\]\'\"\n]', '', text)
+    if text.isascii():
+        text = text.translate(_SPECIAL_CHARS_TABLE)
+    else:
+        text = _SPECIAL_CHARS_RE.sub('', text)
     
     # Strip leading/trailing whitespace
     text = text.strip()
@@ -131,26 +422,34 @@ def get_content_preview(content: str, max_chars: int = 500) -> str:
     return preview + "..."
 
 
-# Future enhancement hooks for RAG integration
-def prepare_for_embedding(content: str) -> list[str]:
+# Chunking for embedding-based retrieval (see retrieval.py)
+def prepare_for_embedding(content: str, chunk_size: int = 1000) -> list[str]:
     """
-    Placeholder for future RAG implementation.
     Split content into chunks suitable for embedding.
     
     Args:
         content: Full webpage content
+        chunk_size: Number of words per chunk (default: 1000)
     
     Returns:
         List of text chunks
     """
-    # TODO: Implement chunk splitting for vector embedding
-    # Could use LangChain's TextSplitter classes
-    chunk_size = 1000
-    chunks = []
-    words = content.split()
+    data = content.encode('utf-8')
+    if not data.strip():
+        return []
+    
+    # Locate word starts in one vectorized pass: a non-whitespace byte
+    # preceded by whitespace (or at position 0)
+    import numpy as np
     
-    for i in range(0, len(words), chunk_size):
-        chunk = ' '.join(words[i:i + chunk_size])
-        chunks.append(chunk)
+    raw = np.frombuffer(data, dtype=np.uint8)
+    is_space = np.isin(raw, np.frombuffer(_WHITESPACE_BYTES, dtype=np.uint8))
+    starts = np.flatnonzero(~is_space & np.concatenate(([True], is_space[:-1])))
     
-    return chunks
+    # Every chunk_size-th word start is a chunk boundary; slicing the bytes
+    # there is always safe because whitespace never splits a UTF-8 sequence
+    bounds = starts[::chunk_size].tolist() + [len(data)]
+    return [
+        data[start:end].strip().decode('utf-8')
+        for start, end in zip(bounds, bounds[1:])
+    ]